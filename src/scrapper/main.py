@@ -4,13 +4,14 @@ Usage: python3 main.py ARTICLE_COUNT OUTPUT_PATH SLEEP
 Scraps ARTICLE_COUNT articles from `kosmonautix.cz` and stores them into OUTPUT_PATH.
 
 ARTICLE_COUNT - positive int that describes count of articles to scrap
-OUTPUT_PATH - string path, where to store the json result
+OUTPUT_PATH - string path, where to store the ndjson result (one json article per line)
 SLEEP - non-negative int that describes seconds to sleep between each request
 """
 
 import sys
-import json
+import asyncio
 import dataclasses
+import orjson
 import scrapper
 
 
@@ -34,14 +35,19 @@ def main() -> int:
         print("Parsing input failed.")
         return 1
 
-    # scrap articles
-    articles = scrapper.Scrapper(article_count, 1, sleep_time=sleep, verbose=True).run()
+    # scrap articles, streaming each one into the output file as ndjson the
+    # moment it is extracted so peak memory stays bounded and a crashed run
+    # keeps everything scrapped so far
+    with open(output_path, "wb", buffering=1 << 20) as out_file:
 
-    # dump into json
-    out_file = open(output_path, "w")
-    json.dump(
-        articles, out_file, indent=6, ensure_ascii=False, cls=scrapper.ArticleEncoder
-    )
+        def write_article(article: scrapper.Article):
+            out_file.write(orjson.dumps(article) + b"\n")
+
+        asyncio.run(
+            scrapper.Scrapper(article_count, 1, sleep_time=sleep, verbose=True).run_async(
+                write_article
+            )
+        )
     return 0
 
 
@@ -3,18 +3,37 @@ The file `scrapper.py` contains all the necessary classes, including Article, Ar
 to scrap page `kosmonautix.cz` and then dump the result into a json format.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+import asyncio
 import json
-import locale
 import time
+import aiohttp
 import requests
 
-from typing import List, Optional
-from bs4 import BeautifulSoup
-
-
-@dataclass
+from typing import Callable, List, Optional
+from selectolax.parser import HTMLParser
+
+# czech genitive month names as used in article dates, e.g. "12. ledna 2021";
+# a static table avoids depending on (and globally mutating) the process locale
+_CZ_MONTHS = {
+    "ledna": 1,
+    "února": 2,
+    "března": 3,
+    "dubna": 4,
+    "května": 5,
+    "června": 6,
+    "července": 7,
+    "srpna": 8,
+    "září": 9,
+    "října": 10,
+    "listopadu": 11,
+    "prosince": 12,
+}
+
+
+@dataclass(slots=True)
 class Article:
     """Dataclass that describes an article.
 
@@ -36,7 +55,8 @@ class ArticleEncoder(json.JSONEncoder):
 
     def default(self, obj):
         if isinstance(obj, Article):
-            return obj.__dict__
+            # slotted dataclasses have no __dict__
+            return {field: getattr(obj, field) for field in obj.__slots__}
         if isinstance(obj, datetime):
             return obj.isoformat()
         # Base class default() raises TypeError:
@@ -51,12 +71,20 @@ class Scrapper:
         start_page: a positive int indicating page from where to start, by default is 1
         sleep_time: seconds to sleep between each request to not get banned, by default is 0
         verbose: bool that indicates whether scrapper should print out information, by default is False
-        parser: string of parser to be used by BeatifulSoap, by defaul is "lxml"
+        concurrency: a positive int limiting how many requests run_async keeps in flight, by default is 8
     """
 
     __url_prefix: str = "https://kosmonautix.cz/page/"
 
-    __date_format: str = "%d. %B %Y"
+    __user_agent: str = "kosmonautix-scrapper/1.0"
+
+    # ask for compressed responses explicitly, brotli included; both requests
+    # (through urllib3) and aiohttp decompress transparently on the way in
+    __headers: dict = {
+        "User-Agent": __user_agent,
+        "Accept": "text/html",
+        "Accept-Encoding": "gzip, br",
+    }
 
     __article_selector_prefix: str = "div #content div >"
     __link_selector_suffix: str = "h2.title > a"
@@ -77,7 +105,7 @@ class Scrapper:
         start_page: int = 1,
         sleep_time: int = 0,
         verbose: bool = False,
-        parser: str = "lxml",
+        concurrency: int = 8,
     ):
         """Initializes all attributes of scrapper described in class docstring."""
 
@@ -87,25 +115,64 @@ class Scrapper:
         self.__start_page: int = start_page
         self.__sleep_time: int = sleep_time
         self.__verbose: bool = verbose
-        self.__parser: str = parser
+        self.__concurrency: int = concurrency
         self.__article_links: List[str] = []
         self.__articles: List[Article] = []
-        locale.setlocale(locale.LC_TIME, "cs_CZ.utf8")
+        self.__session: requests.Session = requests.Session()
+        self.__session.headers.update(self.__headers)
+        self.__session.mount(
+            "https://",
+            requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=concurrency
+            ),
+        )
+
+    def __enter__(self) -> "Scrapper":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the underlying session and its pooled connections."""
 
-    def __extract_page_article_links(self, page_url: str, maximum: int) -> int:
-        """Extracts up to maximum article links from given page url and returns amount of links extracted."""
+        self.__session.close()
 
-        res = requests.get(page_url)
+    def __download(self, url: str) -> bytes:
+        """Downloads given url through the pooled session and returns its raw html bytes."""
+
+        res = self.__session.get(url, timeout=10)
         res.raise_for_status()
-        soup = BeautifulSoup(res.text, self.__parser)
+        return res.content
+
+    async def __fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """Downloads given url through session and returns its raw html bytes.
+
+        Concurrency is bounded by the semaphore and the sleep between requests
+        is awaited while still holding it, so politeness is kept per request.
+        """
+
+        async with self.__semaphore:
+            async with session.get(url) as res:
+                res.raise_for_status()
+                html = await res.read()
+            await asyncio.sleep(self.__sleep_time)
+            return html
 
-        article_title_nodes = soup.select(self.__link_selector)
+    def __extract_page_article_links(
+        self, html: bytes, page_url: str, maximum: int
+    ) -> int:
+        """Extracts up to maximum article links from given page html and returns amount of links extracted."""
+
+        tree = HTMLParser(html)
+
+        article_title_nodes = tree.css(self.__link_selector)
         extracted = 0
         for article_title_node in article_title_nodes:
             if extracted == maximum:
                 break
 
-            link_url = article_title_node.attrs.get("href")
+            link_url = article_title_node.attributes.get("href")
             if link_url is not None:
                 self.__article_links.append(link_url)
                 extracted += 1
@@ -125,7 +192,7 @@ class Scrapper:
             url = f"{self.__url_prefix}{current_page}"
             try:
                 extracted_count += self.__extract_page_article_links(
-                    url, self.__article_count - extracted_count
+                    self.__download(url), url, self.__article_count - extracted_count
                 )
             except Exception as e:  # extracting article links failed for given page failed so stop
                 if self.__verbose:
@@ -137,84 +204,181 @@ class Scrapper:
             time.sleep(self.__sleep_time)
             current_page += 1
 
-    def __extract_node_text(self, soup: BeautifulSoup, selector: str) -> Optional[str]:
-        """Extracts text from given node specified by a soup and selector."""
+    async def __extract_all_article_links_async(self, session: aiohttp.ClientSession):
+        """Extracts all article links concurrently, one batch of pages at a time.
+
+        Amount of pages needed is not known upfront, so pages are downloaded in
+        batches of concurrency size until enough links are extracted or a page fails.
+        """
 
-        candidates = soup.select(selector)
-        if not candidates:
+        if self.__verbose:
+            print("Extracting all article links")
+        extracted_count = 0
+        current_page = self.__start_page
+        failed = False
+        while extracted_count < self.__article_count and not failed:
+            # every page carries at least one link, so the remaining article
+            # count bounds how many pages are worth prefetching
+            batch_size = min(
+                self.__concurrency, self.__article_count - extracted_count
+            )
+            batch = [
+                f"{self.__url_prefix}{page}"
+                for page in range(current_page, current_page + batch_size)
+            ]
+            htmls = await asyncio.gather(
+                *(self.__fetch(session, url) for url in batch),
+                return_exceptions=True,
+            )
+            # consume results in page order up to the first failure, so links
+            # from pages that succeeded before it are kept like in the
+            # sequential path
+            for url, html in zip(batch, htmls):
+                if isinstance(html, BaseException):  # extracting article links failed for given page failed so stop
+                    if self.__verbose:
+                        print(
+                            f"Exception while extracting links for page {url} occured."
+                        )
+                        print(html)
+                    failed = True
+                    break
+                if extracted_count >= self.__article_count:
+                    break
+                extracted_count += self.__extract_page_article_links(
+                    html, url, self.__article_count - extracted_count
+                )
+            current_page += batch_size
+
+    def __extract_node_text(self, tree: HTMLParser, selector: str) -> Optional[str]:
+        """Extracts text from given node specified by a tree and selector."""
+
+        node = tree.css_first(selector)
+        if node is None:
             return None
-        text = candidates[0].get_text()
+        text = node.text()
         return text.strip() if text is not None else None
 
-    def __extract_article_title(self, soup: BeautifulSoup) -> Optional[str]:
+    def __extract_article_title(self, tree: HTMLParser) -> Optional[str]:
         """Extracts article title based on title selector constant specified in the class."""
 
-        return self.__extract_node_text(soup, self.__title_selector)
+        return self.__extract_node_text(tree, self.__title_selector)
 
-    def __extract_article_author(self, soup: BeautifulSoup) -> Optional[str]:
+    def __extract_article_author(self, tree: HTMLParser) -> Optional[str]:
         """Extracts article author based on author selector constant specified in the class."""
 
-        return self.__extract_node_text(soup, self.__author_selector)
+        return self.__extract_node_text(tree, self.__author_selector)
 
-    def __extract_article_date(self, soup: BeautifulSoup) -> Optional[datetime]:
+    def __extract_article_date(self, tree: HTMLParser) -> Optional[datetime]:
         """Extracts article date based on date selector constant specified in the class."""
 
-        date_raw = self.__extract_node_text(soup, self.__date_selector)
+        date_raw = self.__extract_node_text(tree, self.__date_selector)
         if date_raw is None:
             return None
-        date_raw = " ".join(date_raw.split(" ")[:3])
-        return datetime.strptime(date_raw, self.__date_format)
+        # the date is the first 3 tokens, e.g. "12. ledna 2021"
+        day, month, year = date_raw.split(maxsplit=3)[:3]
+        return datetime(int(year), _CZ_MONTHS[month.lower()], int(day.rstrip(".")))
 
-    def __extract_article_content(self, soup: BeautifulSoup) -> Optional[List[str]]:
+    def __extract_article_content(self, tree: HTMLParser) -> Optional[List[str]]:
         """Extracts list of paragraphs as content based on content selector constant specified in the class."""
 
-        paragraph_nodes = soup.select(self.__content_selector)
+        paragraph_nodes = tree.css(self.__content_selector)
         if paragraph_nodes is None:
             return None
         # get texts of all nodes and strip trailing spaces
-        paragraph_node_texts = [node.getText().strip() for node in paragraph_nodes]
-
-        # check last 3 paragraphs if they are not source paragraphs (in czech 'Zdroje')
-        # also check if the paragraph does not include phrase 'Přeloženo'
-        # (source of translated article)
-        pop = 0
-        for i in range(1, 4):
-            if len(paragraph_node_texts) < i:
+        paragraph_node_texts = [node.text().strip() for node in paragraph_nodes]
+
+        # trim trailing paragraphs that are source credits (in czech 'Zdroje')
+        # or translation credits ('Přeloženo'), checking at most the last 3
+        cutoff = len(paragraph_node_texts)
+        for text in reversed(paragraph_node_texts[-3:]):
+            if text.lower().startswith(("zdroje", "přeloženo")):
+                cutoff -= 1
+            else:
                 break
-            lower_text = paragraph_node_texts[-i].lower()
-            if lower_text.startswith("zdroje") or lower_text.startswith("přeloženo"):
-                pop += 1
-
-        # remove all the paragraphs that are not considered text
-        for i in range(pop):
-            paragraph_node_texts.pop()
 
         # filter out paragraphs that are for some reason None or empty
-        return [*filter(lambda p: p is not None and p != "", paragraph_node_texts)]
+        return [text for text in paragraph_node_texts[:cutoff] if text]
 
-    def __extract_article(self, url: str) -> Article:
-        """Extracts a single article based on given url."""
+    def __extract_article(self, html: bytes) -> Article:
+        """Extracts a single article from given html."""
 
-        if self.__verbose:
-            print(f"Extracting article from url {url}")
-        res = requests.get(url)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.text, self.__parser)
+        tree = HTMLParser(html)
         return Article(
-            self.__extract_article_title(soup),
-            self.__extract_article_author(soup),
-            self.__extract_article_date(soup),
-            self.__extract_article_content(soup),
+            self.__extract_article_title(tree),
+            self.__extract_article_author(tree),
+            self.__extract_article_date(tree),
+            self.__extract_article_content(tree),
         )
 
-    def __extract_all_articles(self) -> List[Article]:
-        """Extracts and returns all articles based on article links."""
+    def __scrap_article_sync(self, url: str) -> Article:
+        """Downloads and extracts a single article based on given url.
+
+        Sleeps after the download inside the worker, so each of the
+        concurrency workers keeps its own politeness pace.
+        """
+
+        if self.__verbose:
+            print(f"Extracting article from url {url}")
+        html = self.__download(url)
+        time.sleep(self.__sleep_time)
+        return self.__extract_article(html)
+
+    def __extract_all_articles(
+        self, writer: Optional[Callable[[Article], None]] = None
+    ) -> List[Article]:
+        """Extracts and returns all articles based on article links, downloading them through a thread pool.
+
+        When writer is given it is called with each article as soon as it is
+        extracted, so output can be emitted incrementally.
+        """
 
         if self.__verbose:
             print(f"Extracting all articles.")
-        for url in self.__article_links:
-            self.__articles.append(self.__extract_article(url))
-            time.sleep(self.__sleep_time)
+        with ThreadPoolExecutor(max_workers=self.__concurrency) as executor:
+            for article in executor.map(
+                self.__scrap_article_sync, self.__article_links
+            ):
+                if writer is not None:
+                    writer(article)
+                self.__articles.append(article)
+        return self.__articles
+
+    async def __scrap_article_async(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        writer: Optional[Callable[[Article], None]] = None,
+    ) -> Article:
+        """Downloads and extracts a single article based on given url, passing it to writer when given."""
+
+        if self.__verbose:
+            print(f"Extracting article from url {url}")
+        article = self.__extract_article(await self.__fetch(session, url))
+        if writer is not None:
+            writer(article)
+        return article
+
+    async def __extract_all_articles_async(
+        self,
+        session: aiohttp.ClientSession,
+        writer: Optional[Callable[[Article], None]] = None,
+    ) -> List[Article]:
+        """Extracts and returns all articles based on article links, downloading them concurrently.
+
+        When writer is given it is called with each article as soon as it is
+        extracted (in completion order), so output can be emitted incrementally.
+        """
+
+        if self.__verbose:
+            print(f"Extracting all articles.")
+        self.__articles = list(
+            await asyncio.gather(
+                *(
+                    self.__scrap_article_async(session, url, writer)
+                    for url in self.__article_links
+                )
+            )
+        )
         return self.__articles
 
     @property
@@ -233,13 +397,21 @@ class Scrapper:
             self.__article_links = []
         return self
 
-    def run(self) -> List[Article]:
-        """Runs the scrapper and returns list of articles."""
+    def run(
+        self, writer: Optional[Callable[[Article], None]] = None
+    ) -> List[Article]:
+        """Runs the scrapper and returns list of articles.
+
+        Optional writer is called with each article as soon as it is extracted.
+        """
 
         if self.__verbose:
             print(f"Running scrapper.")
         # if articles are non-empty then return them
         if self.__articles:
+            if writer is not None:
+                for article in self.__articles:
+                    writer(article)
             return self.__articles
 
         # extract all article links in case they are empty
@@ -247,12 +419,41 @@ class Scrapper:
             self.__extract_all_article_links()
 
         # extract all articles from previously extracted article links
-        return self.__extract_all_articles()
+        return self.__extract_all_articles(writer)
+
+    async def run_async(
+        self, writer: Optional[Callable[[Article], None]] = None
+    ) -> List[Article]:
+        """Runs the scrapper with concurrent downloads and returns list of articles.
+
+        Optional writer is called with each article as soon as it is extracted.
+        """
+
+        if self.__verbose:
+            print(f"Running scrapper.")
+        # if articles are non-empty then return them
+        if self.__articles:
+            if writer is not None:
+                for article in self.__articles:
+                    writer(article)
+            return self.__articles
+
+        self.__semaphore = asyncio.Semaphore(self.__concurrency)
+        connector = aiohttp.TCPConnector(limit=self.__concurrency)
+        async with aiohttp.ClientSession(
+            connector=connector, headers=self.__headers, auto_decompress=True
+        ) as session:
+            # extract all article links in case they are empty
+            if not self.__article_links:
+                await self.__extract_all_article_links_async(session)
+
+            # extract all articles from previously extracted article links
+            return await self.__extract_all_articles_async(session, writer)
 
     def scrap_article(self, url: str) -> Optional[Article]:
         """Scraps article from given url and returns None if the url is not responding."""
 
         try:
-            return self.__extract_article(url)
+            return self.__extract_article(self.__download(url))
         except BaseException:
             return None